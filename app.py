@@ -1,32 +1,57 @@
 """Simple Flask backend to expose ControlID client operations via HTTP API.
 
 This backend provides endpoints to create, update and delete users, and to
-upload facial images.  It maintains a simple in‑memory mapping between
-registrations (string IDs in your system) and the numeric IDs assigned by
-the Control iD device.  Adjust the mapping store to a persistent database
-as needed for your production environment.
+upload facial images.  It maintains a mapping between registrations
+(string IDs in your system) and the numeric IDs assigned by the Control iD
+device, kept in a SQLite file.
 
 Configuration is done via environment variables:
 
 * ``CONTROLID_BASE_URL`` – base URL of the Control iD device (e.g. ``http://192.168.0.10``).
 * ``CONTROLID_LOGIN`` – login username for the device.
 * ``CONTROLID_PASSWORD`` – password for the device.
+* ``CONTROLID_MAP_DB`` – path of the SQLite file holding the registration
+  mapping (default ``user_map.sqlite3``).
 
-Run the server with ``python app.py``.  By default it listens on port 5000.
+Run the development server with ``python app.py``.  By default it listens on
+port 5000.  In production serve it with a threaded WSGI server instead, e.g.
+``gunicorn -k gthread --threads 16 app:app`` (worker count from
+``WEB_CONCURRENCY``).
 
 """
 
 from __future__ import annotations
 
 import os
-from typing import Dict, Optional, Tuple
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 
 from controlid_system.client.controlid_client import ControlIDClient, ControlIDError
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to Flask's stdlib encoder
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that serialises responses with ``orjson``."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialise the Flask app
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 
 # Create a single client instance; session will be reused automatically
 client = ControlIDClient(
@@ -35,9 +60,95 @@ client = ControlIDClient(
     password=os.getenv("CONTROLID_PASSWORD", "admin"),
 )
 
-# In‑memory mapping of registration (string) -> device user ID (int)
-# Replace this with a database for persistent storage in production.
-user_map: Dict[str, int] = {}
+
+class RegistrationStore:
+    """Thread‑safe mapping of registration (string) -> device user ID (int).
+
+    Every lookup reads the SQLite table directly (a primary-key lookup), so
+    there is no per-process copy that could go stale: the SQLite file runs in
+    WAL mode and several worker processes see each other's writes at once.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS user_map ("
+            "registration TEXT PRIMARY KEY, device_user_id INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, registration: str) -> Optional[int]:
+        """Return the device ID for ``registration`` or ``None`` if unknown."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT device_user_id FROM user_map WHERE registration = ?",
+                (registration,),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, registration: str, device_id: int) -> None:
+        """Store (or replace) the mapping for ``registration``."""
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO user_map (registration, device_user_id) VALUES (?, ?)",
+                    (registration, device_id),
+                )
+
+    def put_many(self, items: Dict[str, int]) -> None:
+        """Store several mappings in a single transaction."""
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO user_map (registration, device_user_id) VALUES (?, ?)",
+                    items.items(),
+                )
+
+    def delete(self, registration: str) -> None:
+        """Remove the mapping for ``registration``."""
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM user_map WHERE registration = ?", (registration,))
+
+
+class _SizedStream:
+    """Read-only view of an upload stream that reports its size via ``len()``.
+
+    ``requests`` sizes request bodies with ``len()`` when available and falls
+    back to ``fileno()`` otherwise; on Werkzeug's ``SpooledTemporaryFile``
+    that call rolls the in-memory spool over to a temporary file on disk.
+    """
+
+    def __init__(self, stream, size: int) -> None:
+        self._stream = stream
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._stream.seek(offset, whence)
+
+
+# Mapping of registration -> device user ID shared by all request handlers
+user_map = RegistrationStore(os.getenv("CONTROLID_MAP_DB", "user_map.sqlite3"))
+
+# Largest page ``GET /api/users`` asks the device for
+MAX_USERS_PAGE = 1000
+
+# Registrations that would be shadowed by the static ``/api/users/batch`` routes
+RESERVED_REGISTRATIONS = frozenset({"batch"})
 
 
 def lookup_user(registration: str) -> Tuple[Optional[int], Optional[Dict[str, str]]]:
@@ -68,13 +179,17 @@ def create_user() -> Tuple[Dict[str, int] | Dict[str, str], int]:
         return {
             "error": "Campos obrigatórios 'registration' e 'name' faltando."
         }, 400
+    if not isinstance(registration, str):
+        return {"error": "Campo 'registration' deve ser texto."}, 400
+    if registration in RESERVED_REGISTRATIONS:
+        return {"error": f"Registro {registration!r} é reservado."}, 400
     try:
         # Create user on the device and record mapping
         device_id = client.create_user(registration=registration, name=name, **{
             k: v for k, v in data.items()
             if k not in {"registration", "name"}
         })
-        user_map[registration] = device_id
+        user_map.put(registration, device_id)
         return {
             "registration": registration,
             "device_user_id": device_id,
@@ -83,6 +198,125 @@ def create_user() -> Tuple[Dict[str, int] | Dict[str, str], int]:
         return {"error": str(exc)}, 400
 
 
+@app.route("/api/users/batch", methods=["POST"])
+def create_users_batch() -> Tuple[Dict[str, object], int]:
+    """Create several users with a single call to the device.
+
+    Expects JSON ``{"users": [{"registration": ..., "name": ..., ...}, ...]}``.
+    """
+    data = request.get_json(silent=True) or {}
+    users = data.get("users")
+    if not isinstance(users, list) or not users:
+        return {"error": "Campo 'users' deve ser uma lista não vazia."}, 400
+    registrations = [u.get("registration") for u in users if isinstance(u, dict)]
+    if len(registrations) != len(users) or not all(
+        u.get("registration") and u.get("name") for u in users
+    ):
+        return {
+            "error": "Todos os usuários precisam dos campos 'registration' e 'name'."
+        }, 400
+    if not all(isinstance(r, str) for r in registrations):
+        return {"error": "Campo 'registration' deve ser texto."}, 400
+    if len(set(registrations)) != len(registrations):
+        return {"error": "Registros duplicados no lote."}, 400
+    reserved = RESERVED_REGISTRATIONS.intersection(registrations)
+    if reserved:
+        return {"error": f"Registros reservados: {sorted(reserved)}."}, 400
+    try:
+        ids = client.create_objects("users", users)
+    except ControlIDError as exc:
+        return {"error": str(exc)}, 400
+    if len(ids) != len(users):
+        return {
+            "error": f"Equipamento retornou {len(ids)} IDs para {len(users)} usuários."
+        }, 400
+    created = dict(zip(registrations, ids))
+    user_map.put_many(created)
+    return {"users": created}, 201
+
+
+def _batch_registrations() -> Tuple[Optional[list], Optional[Dict[str, str]]]:
+    """Extract the ``users`` list of a batch PUT/DELETE request body.
+
+    Failures of these endpoints are reported as a list of
+    ``{"index", "registration", "error"}`` objects, one per failed entry, so
+    several invalid entries never collapse into a single error.
+    """
+    data = request.get_json(silent=True) or {}
+    users = data.get("users")
+    if not isinstance(users, list) or not users:
+        return None, {"error": "Campo 'users' deve ser uma lista não vazia."}
+    return users, None
+
+
+def _batch_status(applied: list, errors: list) -> int:
+    """HTTP status of a batch PUT/DELETE: 200, 207 if only partly applied, 400 if nothing was."""
+    if not errors:
+        return 200
+    return 207 if applied else 400
+
+
+@app.route("/api/users/batch", methods=["PUT"])
+def update_users_batch() -> Tuple[Dict[str, object], int]:
+    """Update several users.
+
+    Expects JSON ``{"users": [{"registration": ..., <fields>}, ...]}``.  The
+    device only filters by equality, so one request is sent per user.
+    """
+    users, error = _batch_registrations()
+    if error:
+        return error, 400
+    updated = []
+    errors: List[Dict[str, object]] = []
+    for index, item in enumerate(users):
+        fields = dict(item) if isinstance(item, dict) else {}
+        registration = fields.pop("registration", None)
+        device_id = user_map.get(registration) if isinstance(registration, str) else None
+        if device_id is None or not fields:
+            errors.append({
+                "index": index,
+                "registration": registration,
+                "error": "Usuário não mapeado ou sem campos para atualizar.",
+            })
+            continue
+        try:
+            client.update_user(device_id, **fields)
+            updated.append(registration)
+        except ControlIDError as exc:
+            errors.append({"index": index, "registration": registration, "error": str(exc)})
+    return {"updated": updated, "errors": errors}, _batch_status(updated, errors)
+
+
+@app.route("/api/users/batch", methods=["DELETE"])
+def delete_users_batch() -> Tuple[Dict[str, object], int]:
+    """Delete several users.
+
+    Expects JSON ``{"users": ["registration", ...]}``.  The device only
+    filters by equality, so one request is sent per user.
+    """
+    registrations, error = _batch_registrations()
+    if error:
+        return error, 400
+    removed = []
+    errors: List[Dict[str, object]] = []
+    for index, registration in enumerate(registrations):
+        device_id = user_map.get(registration) if isinstance(registration, str) else None
+        if device_id is None:
+            errors.append({
+                "index": index,
+                "registration": registration,
+                "error": "Usuário não encontrado no mapeamento local.",
+            })
+            continue
+        try:
+            client.delete_user(device_id)
+            user_map.delete(registration)
+            removed.append(registration)
+        except ControlIDError as exc:
+            errors.append({"index": index, "registration": registration, "error": str(exc)})
+    return {"removed": removed, "errors": errors}, _batch_status(removed, errors)
+
+
 @app.route("/api/users/<registration>", methods=["PUT"])
 def update_user(registration: str) -> Tuple[Dict[str, str], int]:
     """Update an existing user.
@@ -111,7 +345,7 @@ def delete_user(registration: str) -> Tuple[Dict[str, str], int]:
     try:
         client.delete_user(device_id)
         # remove local mapping
-        user_map.pop(registration, None)
+        user_map.delete(registration)
         return {"detail": "Usuário removido com sucesso."}, 200
     except ControlIDError as exc:
         return {"error": str(exc)}, 400
@@ -129,20 +363,86 @@ def set_user_image(registration: str) -> Tuple[Dict[str, str], int]:
     file = request.files.get("file")
     if not file:
         return {"error": "Arquivo de imagem não enviado. Use campo 'file'."}, 400
-    data = file.read()
-    if not data:
+    # stream the upload to the device instead of reading it into memory; the
+    # size is passed along so small uploads stay in Werkzeug's memory spool
+    stream = file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    if not size:
         return {"error": "Conteúdo do arquivo vazio."}, 400
+    stream.seek(0)
     try:
-        client.set_user_image(device_id, data)
+        client.set_user_image(device_id, _SizedStream(stream, size))
         return {"detail": "Imagem enviada com sucesso."}, 200
     except ControlIDError as exc:
         return {"error": str(exc)}, 400
 
 
+@app.route("/api/users/images/batch", methods=["POST"])
+def set_user_images_batch() -> Tuple[Dict[str, object], int]:
+    """Upload facial images for several users in a single device call.
+
+    Expects a multipart/form-data request with one ``file_<registration>``
+    field per user.
+    """
+    images = []
+    registrations = []
+    for field, file in request.files.items():
+        if not field.startswith("file_"):
+            continue
+        registration = field[len("file_"):]
+        device_id, error = lookup_user(registration)
+        if error:
+            return error, 404
+        data = file.read()
+        if not data:
+            return {"error": f"Conteúdo do arquivo vazio para {registration!r}."}, 400
+        images.append({"user_id": device_id, "image": data})
+        registrations.append(registration)
+    if not images:
+        return {"error": "Nenhuma imagem enviada. Use campos 'file_<registration>'."}, 400
+    try:
+        result = client.set_user_image_list(images, match=True)
+    except ControlIDError as exc:
+        return {"error": str(exc)}, 400
+    return {"registrations": registrations, "result": result}, 200
+
+
 @app.route("/api/users", methods=["GET"])
-def list_users() -> Tuple[Dict[str, int], int]:
-    """List local users and their corresponding device IDs."""
-    return {"users": user_map}, 200
+def list_users() -> Response | Tuple[Dict[str, str], int]:
+    """List users registered on the device.
+
+    Pagination (``limit``, default 100 and capped at ``MAX_USERS_PAGE``, and
+    ``offset``) and the optional ``registration``/``name`` filters are pushed
+    down to ``load_objects`` so the device only returns the requested page.
+    The body is serialised once and its hash sent as the ETag, with
+    ``Cache-Control: no-cache``: clients revalidate on every request (a write
+    through this API changes the ETag) and get a 304 when the page is
+    unchanged.
+    """
+    limit = request.args.get("limit", 100, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if limit <= 0 or offset < 0:
+        return {"error": "Parâmetros 'limit' e 'offset' inválidos."}, 400
+    limit = min(limit, MAX_USERS_PAGE)
+    filters = {
+        key: request.args[key] for key in ("registration", "name") if key in request.args
+    }
+    try:
+        users = client.load_objects(
+            "users",
+            fields=["id", "registration", "name"],
+            limit=limit,
+            offset=offset,
+            where=filters,
+        )
+    except ControlIDError as exc:
+        return {"error": str(exc)}, 400
+
+    response = jsonify(limit=limit, offset=offset, users=users)
+    response.add_etag()
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 if __name__ == "__main__":
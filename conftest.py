@@ -0,0 +1,12 @@
+"""Configuração do pytest para os testes do ControlIDClient."""
+
+import importlib.util
+import pathlib
+import sys
+
+# Ajusta sys.path para permitir importação do pacote local quando os testes são
+# executados a partir do diretório controlid_system. Feito aqui, uma única vez
+# na coleta, em vez de como efeito colateral da importação dos módulos de teste.
+# Se o pacote já é importável (instalado ou no PYTHONPATH), nada é inserido.
+if importlib.util.find_spec("controlid_system") is None:
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
@@ -0,0 +1,391 @@
+"""
+controlid_async_client.py
+=========================
+
+Versão assíncrona do :class:`~controlid_system.client.controlid_client.ControlIDClient`,
+baseada em ``httpx.AsyncClient``. Os métodos públicos espelham os do cliente
+síncrono, mas são corrotinas: um único event loop pode manter dezenas de
+chamadas ao equipamento em andamento ao mesmo tempo, reaproveitando as
+conexões do pool.
+
+Este módulo depende do pacote `httpx`. Para instalar:
+
+    pip install httpx
+
+Para HTTP/2 (nem todos os firmwares suportam), instale `httpx[http2]` e use
+``http2=True``.
+
+Exemplo de uso::
+
+    import asyncio
+    from controlid_system.client.controlid_async_client import AsyncControlIDClient
+
+    async def main():
+        async with AsyncControlIDClient("http://192.168.0.10", "admin", "admin") as client:
+            user_id = await client.create_user(registration="1234", name="Fulano de Tal")
+            await asyncio.gather(
+                client.set_user_image(user_id, "/caminho/para/foto.jpg"),
+                client.list_user_images(),
+            )
+
+    asyncio.run(main())
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from .controlid_client import (
+    _ENDPOINT_PATHS,
+    ControlIDClient,
+    ControlIDError,
+    _decode_body,
+    _dumps,
+    _encode_user_images,
+    _loads,
+)
+
+
+class AsyncControlIDClient:
+    """Cliente assíncrono da API Control iD.
+
+    :param base_url: URL base do equipamento, por exemplo "http://192.168.0.10".
+    :param login: Usuário para autenticação.
+    :param password: Senha para autenticação.
+    :param timeout: Timeout padrão (segundos) para requisições HTTP.
+    :param pool_size: Quantidade de conexões mantidas no pool HTTP compartilhado.
+    :param session_ttl: Tempo (segundos) em que a sessão é considerada válida sem nova verificação.
+    :param http2: Se verdadeiro, negocia HTTP/2 (requer `httpx[http2]`).
+    :param transport: Transporte ``httpx`` alternativo (ex.: ``httpx.MockTransport`` em testes).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        login: str,
+        password: str,
+        *,
+        timeout: int = 10,
+        pool_size: int = 32,
+        session_ttl: int = 300,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.login = login
+        self.password = password
+        self.timeout = timeout
+        self._http = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=timeout,
+            transport=transport,
+        )
+        self._session_id: Optional[str] = None
+        self._login_url = f"{self.base_url}/login.fcgi"
+        self._urls: Dict[str, str] = {}
+        self._session_ttl = session_ttl
+        self._session_expires_at: float = 0
+        self._session_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncControlIDClient":
+        await self.login_session()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Encerra a sessão (se houver) e fecha as conexões do pool."""
+        try:
+            await self.logout()
+        finally:
+            await self._http.aclose()
+
+    # ------------------------------------------------------------------
+    # Sessão
+    async def login_session(self) -> str:
+        """Efetua login no equipamento.
+
+        :returns: string da sessão
+        :raises ControlIDError: se a autenticação falhar
+        """
+        payload = {"login": self.login, "password": self.password}
+        try:
+            resp = await self._http.post(self._login_url, json=payload)
+        except Exception as exc:
+            raise ControlIDError(f"Erro ao conectar ao equipamento: {exc}")
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro HTTP ao efetuar login: {resp.status_code} - {resp.text}")
+        data = _loads(resp)
+        session = data.get("session")
+        if not session:
+            raise ControlIDError(f"Resposta inesperada ao efetuar login: {data}")
+        self._set_session(session)
+        return session
+
+    def _set_session(self, session: str) -> None:
+        """Registra a sessão corrente e pré-monta as URLs dos endpoints."""
+        self._urls = {
+            name: f"{self.base_url}{path}?session={session}"
+            for name, path in _ENDPOINT_PATHS.items()
+        }
+        self._session_id = session
+        self._session_expires_at = time.monotonic() + self._session_ttl
+
+    async def session_is_valid(self) -> bool:
+        """Verifica junto ao equipamento se a sessão corrente é válida."""
+        if not self._session_id:
+            return False
+        try:
+            resp = await self._http.post(self._urls["session_is_valid"])
+        except Exception as exc:
+            raise ControlIDError(f"Erro ao checar sessão: {exc}")
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro HTTP ao checar sessão: {resp.status_code} - {resp.text}")
+        return bool(_loads(resp).get("session_is_valid"))
+
+    async def ensure_session(self) -> None:
+        """Garante que existe uma sessão válida, realizando login se necessário."""
+        if self._session_id and time.monotonic() < self._session_expires_at:
+            return
+        async with self._session_lock:
+            # outra tarefa pode ter renovado a sessão enquanto esperávamos o lock
+            if not self._session_id or time.monotonic() >= self._session_expires_at:
+                await self.login_session()
+
+    def invalidate_session(self) -> None:
+        """Descarta a sessão local, forçando novo login na próxima chamada."""
+        self._session_expires_at = 0
+        self._session_id = None
+        self._urls = {}
+
+    async def _renew_session(self, stale: Optional[str]) -> None:
+        """Refaz o login após sessão expirada, a menos que outra tarefa já o tenha feito.
+
+        A sessão antiga só é substituída quando o login termina, para que tarefas
+        em andamento nunca encontrem ``_urls`` vazio.
+        """
+        async with self._session_lock:
+            if self._session_id == stale:
+                await self.login_session()
+
+    async def logout(self) -> None:
+        """Encerra a sessão atual (opcional)."""
+        if not self._session_id:
+            return
+        try:
+            await self._http.post(self._urls["logout"])
+        finally:
+            self.invalidate_session()
+
+    # ------------------------------------------------------------------
+    # Operações genéricas
+    async def _post_json(self, endpoint: str, payload: Dict[str, Any]) -> Any:
+        """Envia um POST JSON ao endpoint especificado com o payload dado.
+
+        :param endpoint: Nome do endpoint em ``_ENDPOINT_PATHS`` (por exemplo, "create_objects").
+        :param payload: Dicionário com o corpo da requisição.
+        :returns: Dados retornados pela API (normalmente um dicionário).
+        :raises ControlIDError: se a requisição falhar.
+        """
+        resp = await self._request(
+            "POST",
+            endpoint,
+            content=_dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro HTTP ao chamar {endpoint}: {resp.status_code} - {resp.text}")
+        return _decode_body(resp)
+
+    async def _request(self, method: str, endpoint: str, query: str = "", **kwargs: Any) -> httpx.Response:
+        """Executa uma requisição autenticada, sem tratar o status HTTP.
+
+        Se o equipamento sinalizar sessão expirada antes do TTL local, a sessão
+        é renovada e a requisição repetida uma vez.
+
+        :param method: Método HTTP ("POST" ou "GET").
+        :param endpoint: Nome do endpoint em ``_ENDPOINT_PATHS``.
+        :param query: Parâmetros adicionais da query-string (ex.: "&user_id=1").
+        :param kwargs: Demais argumentos repassados ao ``httpx``.
+        """
+        await self.ensure_session()
+        session = self._session_id
+        resp = await self._send(method, endpoint, query, **kwargs)
+        if ControlIDClient._session_expired(resp):
+            await self._renew_session(session)
+            resp = await self._send(method, endpoint, query, **kwargs)
+        return resp
+
+    async def _send(self, method: str, endpoint: str, query: str = "", **kwargs: Any) -> httpx.Response:
+        """Envia a requisição uma única vez com a sessão corrente."""
+        try:
+            return await self._http.request(method, self._urls[endpoint] + query, **kwargs)
+        except Exception as exc:
+            raise ControlIDError(f"Erro ao chamar {endpoint}: {exc}")
+
+    # ------------------------------------------------------------------
+    # CRUD de objetos
+    async def create_objects(self, object_type: str, values: Iterable[Dict[str, Any]]) -> List[int]:
+        """Cria objetos do tipo especificado e retorna os IDs gerados."""
+        payload = {"object": object_type, "values": list(values)}
+        data = await self._post_json("create_objects", payload)
+        ids = data.get("ids")
+        return ids if ids is not None else []
+
+    async def modify_objects(self, object_type: str, values: Dict[str, Any], where: Dict[str, Any]) -> int:
+        """Modifica objetos do tipo especificado e retorna o número de registros alterados."""
+        payload = {"object": object_type, "values": values, "where": {object_type: where}}
+        data = await self._post_json("modify_objects", payload)
+        return int(data.get("modified", 0))
+
+    async def destroy_objects(self, object_type: str, where: Dict[str, Any]) -> int:
+        """Exclui objetos com base em um filtro e retorna o número de registros removidos."""
+        payload = {"object": object_type, "where": {object_type: where}}
+        data = await self._post_json("destroy_objects", payload)
+        return int(data.get("destroyed", 0))
+
+    async def load_objects(
+        self,
+        object_type: str,
+        *,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Carrega objetos de um tipo específico com filtros opcionais."""
+        payload: Dict[str, Any] = {"object": object_type}
+        if fields:
+            payload["fields"] = fields
+        if limit is not None:
+            payload["limit"] = limit
+        if offset is not None:
+            payload["offset"] = offset
+        if where:
+            payload["where"] = {object_type: where}
+        data = await self._post_json("load_objects", payload)
+        return data.get("objects", [])
+
+    # ------------------------------------------------------------------
+    # Métodos de alto nível (usuários)
+    async def create_user(self, registration: str, name: str, **extra_fields: Any) -> int:
+        """Cria um usuário no equipamento e retorna seu ID."""
+        values = {"registration": registration, "name": name}
+        values.update(extra_fields)
+        ids = await self.create_objects("users", [values])
+        if not ids:
+            raise ControlIDError("Falha ao criar usuário: nenhum ID retornado")
+        return ids[0]
+
+    async def update_user(self, user_id: int, **fields: Any) -> None:
+        """Atualiza campos de um usuário existente."""
+        modified = await self.modify_objects("users", fields, {"id": user_id})
+        if modified == 0:
+            raise ControlIDError(f"Nenhum usuário modificado ao atualizar ID {user_id}")
+
+    async def delete_user(self, user_id: int) -> None:
+        """Remove um usuário pelo ID."""
+        removed = await self.destroy_objects("users", {"id": user_id})
+        if removed == 0:
+            raise ControlIDError(f"Nenhum usuário removido ao excluir ID {user_id}")
+
+    async def list_users(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Lista usuários com filtros opcionais."""
+        return await self.load_objects("users", where=filters)
+
+    # ------------------------------------------------------------------
+    # Operações de imagem facial
+    async def set_user_image(
+        self,
+        user_id: int,
+        image: Any,
+        *,
+        timestamp: Optional[int] = None,
+        match: bool = True,
+    ) -> Dict[str, Any]:
+        """Envia uma foto facial para um usuário.
+
+        :param user_id: ID do usuário.
+        :param image: Caminho para o arquivo de imagem ou bytes da imagem JPEG.
+        :param timestamp: Unix timestamp em milissegundos; se None, usa agora.
+        :param match: Verdadeiro para detectar duplicidade de rosto.
+        :returns: Objeto JSON retornado pelo equipamento, contendo scores ou erros.
+        """
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+        match_param = 1 if match else 0
+        query = f"&user_id={user_id}&timestamp={timestamp}&match={match_param}"
+        if isinstance(image, str):
+            # leitura do disco fora do event loop
+            with open(image, "rb") as fh:
+                data = await asyncio.to_thread(fh.read)
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            data = image
+        else:
+            raise TypeError("image deve ser caminho, bytes, bytearray ou memoryview")
+        resp = await self._request(
+            "POST",
+            "user_set_image",
+            query,
+            content=data,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro HTTP ao enviar imagem: {resp.status_code} - {resp.text}")
+        body = _decode_body(resp)
+        return {"response": body} if isinstance(body, str) else body
+
+    async def set_user_image_list(
+        self,
+        user_images: Iterable[Dict[str, Any]],
+        *,
+        match: bool = True,
+    ) -> Dict[str, Any]:
+        """Envia uma lista de fotos faciais para vários usuários.
+
+        A codificação base64 roda em uma thread para não bloquear o event loop.
+        """
+        images_payload = await asyncio.to_thread(_encode_user_images, list(user_images))
+        payload = {"match": 1 if match else 0, "user_images": images_payload}
+        return await self._post_json("user_set_image_list", payload)
+
+    async def list_user_images(self, *, get_timestamp: bool = False) -> List[Any]:
+        """Lista usuários que possuem imagens cadastradas."""
+        get_ts = 1 if get_timestamp else 0
+        resp = await self._request("GET", "user_list_images", f"&get_timestamp={get_ts}")
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro ao listar imagens: {resp.status_code} - {resp.text}")
+        return _loads(resp).get("user_ids", [])
+
+    async def get_user_image_list(self, user_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Obtém imagens (base64) de usuários."""
+        payload: Dict[str, Any] = {}
+        if user_ids:
+            payload["user_ids"] = user_ids
+        data = await self._post_json("user_get_image_list", payload)
+        return data.get("user_images", [])
+
+    async def delete_user_image(
+        self,
+        user_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None,
+        all_images: bool = False,
+    ) -> None:
+        """Remove imagens faciais de usuários."""
+        payload: Dict[str, Any] = {}
+        if all_images:
+            payload["all"] = True
+        elif user_id is not None:
+            payload["user_id"] = user_id
+        elif user_ids is not None:
+            payload["user_ids"] = user_ids
+        else:
+            raise ValueError("Informe user_id, user_ids ou all_images=True")
+        await self._post_json("user_destroy_image", payload)
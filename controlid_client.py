@@ -20,6 +20,10 @@ Este módulo depende do pacote `requests`. Para instalar:
 
     pip install requests
 
+Se o pacote opcional `orjson` estiver instalado, ele é usado para serializar
+e decodificar o JSON trocado com o equipamento. Da mesma forma, `pybase64`
+(opcional) acelera a codificação base64 das fotos faciais.
+
 Exemplo de uso::
 
     from controlid_system.client.controlid_client import ControlIDClient
@@ -33,12 +37,299 @@ Exemplo de uso::
 from __future__ import annotations
 
 import base64
+import copy
 import json
+import mmap
 import os
+import random
+import socket
+import stat
+import threading
 import time
-from typing import Any, Dict, Iterable, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:  # pybase64 é opcional; sem ele usamos o base64 da stdlib
+    pybase64 = None
+
+
+# Caminhos dos endpoints que recebem a sessão na query-string
+_ENDPOINT_PATHS: Dict[str, str] = {
+    "create_objects": "/create_objects.fcgi",
+    "modify_objects": "/modify_objects.fcgi",
+    "destroy_objects": "/destroy_objects.fcgi",
+    "load_objects": "/load_objects.fcgi",
+    "logout": "/logout.fcgi",
+    "session_is_valid": "/session_is_valid.fcgi",
+    "user_set_image": "/user_set_image.fcgi",
+    "user_set_image_list": "/user_set_image_list.fcgi",
+    "user_list_images": "/user_list_images.fcgi",
+    "user_get_image_list": "/user_get_image_list.fcgi",
+    "user_destroy_image": "/user_destroy_image.fcgi",
+}
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serializa ``obj`` em JSON (bytes), usando orjson quando disponível."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _loads(resp: requests.Response) -> Any:
+    """Decodifica o corpo JSON de ``resp``, usando orjson quando disponível."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+def _decode_body(resp: requests.Response) -> Any:
+    """Decodifica o corpo da resposta conforme o Content-Type.
+
+    Corpos declarados como JSON (ou sem Content-Type) são decodificados como
+    JSON; os demais, e corpos JSON vazios ou inválidos (alguns endpoints
+    declaram JSON mas não retornam corpo), são retornados como texto UTF-8.
+    """
+    ctype = resp.headers.get("Content-Type", "")
+    if "json" in ctype or not ctype:
+        try:
+            return _loads(resp)
+        except json.JSONDecodeError:
+            pass
+    return resp.content.decode("utf-8", errors="replace")
+
+
+def _b64encode(data: Any) -> str:
+    """Codifica um objeto bytes-like em base64, usando pybase64 quando disponível."""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode("ascii")
+
+
+def _b64encode_file(path: str) -> str:
+    """Codifica o conteúdo de um arquivo em base64 via mmap, sem copiá-lo para o heap."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _b64encode(mm)
+
+
+def _stat_image_path(value: str) -> Optional[os.stat_result]:
+    """Retorna o stat de ``value`` se for um arquivo regular, ou None.
+
+    Fotos em base64 têm dezenas de KB, enquanto caminhos são curtos: valores
+    com 4096 caracteres ou mais (ou com prefixo ``data:``) nunca são consultados
+    no sistema de arquivos. Os demais, inclusive nomes relativos sem extensão
+    (ex.: ``"foto"``), são tratados como caminho se o arquivo existir.
+    """
+    if len(value) >= 4096 or value.startswith("data:"):
+        return None
+    try:
+        st = os.stat(value)
+    except (OSError, ValueError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+# Pool compartilhado para codificar lotes de fotos em base64 em paralelo. Só o
+# pybase64 libera o GIL durante a codificação; com o binascii da stdlib o pool
+# só acrescentaria trocas de thread, então a codificação fica sequencial.
+_encode_pool = (
+    ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="controlid-b64")
+    if pybase64 is not None
+    else None
+)
+
+
+def _encode_user_images(user_images: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Monta a lista `user_images` de user_set_image_list.fcgi com as fotos em base64.
+
+    Quando há mais de uma foto a codificar e o pybase64 está disponível, a
+    codificação é distribuída no ``_encode_pool``; a ordem dos itens é preservada.
+    """
+    images_payload = []
+    jobs = []
+    # um único timestamp padrão para todo o lote
+    default_ts = int(time.time() * 1000)
+    for item in user_images:
+        uid = item["user_id"]
+        ts = item.get("timestamp", default_ts)
+        img = item["image"]
+        if isinstance(img, (bytes, bytearray, memoryview)):
+            jobs.append((len(images_payload), _b64encode, (img,)))
+        elif isinstance(img, str):
+            if _stat_image_path(img) is not None:
+                jobs.append((len(images_payload), _b64encode_file, (img,)))
+            # caso contrário, assume string já em base64
+        else:
+            raise ValueError("Campo image deve ser bytes, caminho ou string base64")
+        images_payload.append({"user_id": uid, "timestamp": ts, "image": img})
+    if _encode_pool is not None and len(jobs) > 1:
+        futures = [(index, _encode_pool.submit(func, *args)) for index, func, args in jobs]
+        for index, future in futures:
+            images_payload[index]["image"] = future.result()
+    else:
+        for index, func, args in jobs:
+            images_payload[index]["image"] = func(*args)
+    return images_payload
+
+
+# TCP_NODELAY (já padrão no urllib3) evita o atraso de Nagle em payloads pequenos;
+# keepalive detecta conexões mortas no pool antes de reutilizá-las
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+if hasattr(socket, "TCP_KEEPIDLE"):  # Linux
+    _SOCKET_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+    ]
+
+
+class _JitteredRetry(Retry):
+    """``Retry`` com jitter no backoff exponencial.
+
+    Soma um valor aleatório entre 0 e o próprio backoff, para que vários
+    workers que recebem o mesmo 503 não repitam a chamada em sincronia. O
+    ``backoff_jitter`` nativo só existe no urllib3 2.x.
+    """
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff > 0 else backoff
+
+
+class _ControlIDAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica ``_SOCKET_OPTIONS`` às conexões do pool e nunca envia ``Expect``."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("socket_options", _SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+    def add_headers(self, request: requests.PreparedRequest, **kwargs: Any) -> None:
+        request.headers.pop("Expect", None)
+
+
+class TokenBucket:
+    """Limitador de taxa (token bucket) seguro para uso entre threads.
+
+    :param rate: Tokens repostos por segundo (deve ser positivo).
+    :param capacity: Quantidade máxima de tokens acumulados (tamanho da rajada);
+        deve ser ao menos 1, já que cada chamada consome um token inteiro.
+    :raises ValueError: se ``rate`` ou ``capacity`` forem inválidos.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate deve ser positivo: {rate!r}")
+        if capacity < 1:
+            raise ValueError(f"capacity deve ser ao menos 1: {capacity!r}")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloqueia até haver um token disponível e o consome."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now > self._updated:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._updated - now, 0) + (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Esvazia o bucket e adia a reposição de tokens por ``seconds`` segundos."""
+        with self._lock:
+            self._tokens = 0
+            self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Cache LRU com expiração por tempo, seguro entre threads.
+
+    As chaves são tuplas cujo primeiro elemento é o grupo (ex.: tipo de
+    objeto), usado por :meth:`invalidate`. Com ``ttl <= 0`` nada é guardado.
+    Os valores são copiados ao entrar e ao sair do cache, de modo que quem os
+    altera não corrompe o que os demais recebem.
+
+    Cada grupo tem uma geração, incrementada por :meth:`invalidate`. Quem vai
+    ler do equipamento obtém a geração antes (:meth:`generation`) e a repassa
+    a :meth:`set`: se uma escrita invalidou o grupo nesse meio-tempo, o
+    resultado anterior à escrita é descartado em vez de voltar ao cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        """Retorna uma cópia do valor em cache ou ``_MISSING`` se ausente ou expirado."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def generation(self, group: Hashable) -> int:
+        """Retorna a geração atual do grupo ``group``."""
+        with self._lock:
+            return self._generations.get(group, 0)
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, generation: int) -> None:
+        """Guarda ``value``, descartando a entrada menos usada se o cache estiver cheio.
+
+        :param generation: Geração do grupo obtida antes da leitura; se o grupo
+            foi invalidado desde então, ``value`` não é guardado.
+        """
+        if self.ttl <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if self._generations.get(key[0], 0) != generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, group: Hashable) -> None:
+        """Remove todas as entradas do grupo ``group`` e avança sua geração."""
+        with self._lock:
+            self._generations[group] = self._generations.get(group, 0) + 1
+            for key in [key for key in self._data if key[0] == group]:
+                del self._data[key]
 
 
 class ControlIDError(Exception):
@@ -53,6 +344,14 @@ class ControlIDClient:
     :param password: Senha para autenticação.
     :param timeout: Timeout padrão (segundos) para requisições HTTP.
     :param auto_login: Se verdadeiro, efetua login durante a inicialização.
+    :param pool_size: Quantidade de conexões mantidas no pool HTTP compartilhado.
+    :param max_retries: Novas tentativas em falhas de conexão e respostas 429/503.
+    :param max_rps: Limite de requisições por segundo ao equipamento (None ou 0 desativa).
+    :param read_cache_ttl: Tempo (segundos) em que consultas de leitura ficam em cache (0, o
+        padrão, desativa). O cache é invalidado apenas pelas escritas feitas por este
+        cliente: com vários processos (ex.: workers do gunicorn), escritas de um
+        processo não invalidam o cache dos demais.
+    :param session_ttl: Tempo (segundos) em que a sessão é considerada válida sem nova verificação.
     """
 
     def __init__(
@@ -63,6 +362,11 @@ class ControlIDClient:
         *,
         timeout: int = 10,
         auto_login: bool = True,
+        pool_size: int = 32,
+        max_retries: int = 3,
+        max_rps: Optional[float] = 20,
+        read_cache_ttl: float = 0,
+        session_ttl: int = 300,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.login = login
@@ -70,9 +374,56 @@ class ControlIDClient:
         self.timeout = timeout
         # Usa requests.Session para reutilizar conexões e desabilitar Expect: 100-continue
         self._session_http = requests.Session()
-        # Remove header Expect se existir
-        self._session_http.headers['Expect'] = ''
+        # Remove header Expect se existir (o adapter também o descarta por requisição)
+        self._session_http.headers.pop("Expect", None)
+        # Falhas transitórias do equipamento são repetidas com backoff exponencial
+        # e jitter, mas só quando a requisição certamente não foi processada:
+        # erros de conexão e respostas 429/503 (com Retry-After respeitado). Quase todas as
+        # chamadas são POSTs que gravam (create_objects, user_set_image_list...),
+        # então timeouts de leitura e demais 5xx não são repetidos (read=0), para
+        # não duplicar usuários.
+        retry = _JitteredRetry(
+            total=max_retries,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Pool maior que o padrão (10) para que várias threads do backend
+        # reutilizem conexões já abertas com o equipamento
+        adapter = _ControlIDAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            pool_block=False,
+            max_retries=retry,
+        )
+        self._session_http.mount("http://", adapter)
+        self._session_http.mount("https://", adapter)
+        # Alguns firmwares só mantêm a conexão aberta com o header explícito;
+        # gzip reduz o tráfego das listagens de imagens em base64
+        self._session_http.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "controlid-client/1.0",
+        })
         self._session_id: Optional[str] = None
+        self._login_url = f"{self.base_url}/login.fcgi"
+        # URLs com a sessão já embutida, montadas a cada login
+        self._urls: Dict[str, str] = {}
+        # Validade local da sessão; evita consultar session_is_valid.fcgi a cada chamada
+        self._session_ttl = session_ttl
+        self._session_expires_at: float = 0
+        # Serializa login/renovação quando o cliente é compartilhado entre threads
+        self._session_lock = threading.RLock()
+        # Limita a taxa de chamadas para não sobrecarregar o equipamento
+        if max_rps is not None and max_rps < 0:
+            raise ValueError(f"max_rps não pode ser negativo: {max_rps!r}")
+        # a rajada comporta ao menos uma chamada, mesmo com taxas abaixo de 0,5/s
+        self._bucket = TokenBucket(rate=max_rps, capacity=max(1.0, 2 * max_rps)) if max_rps else None
+        # Cache de leitura (load_objects e listagens de imagens), invalidado a cada escrita
+        self._read_cache = _TTLCache(maxsize=1024, ttl=read_cache_ttl)
         if auto_login:
             self.login_session()
 
@@ -84,20 +435,30 @@ class ControlIDClient:
         :returns: string da sessão
         :raises ControlIDError: se a autenticação falhar
         """
-        url = f"{self.base_url}/login.fcgi"
+        url = self._login_url
         payload = {"login": self.login, "password": self.password}
-        try:
-            resp = self._session_http.post(url, json=payload, timeout=self.timeout)
-        except Exception as exc:
-            raise ControlIDError(f"Erro ao conectar ao equipamento: {exc}")
-        if resp.status_code != 200:
-            raise ControlIDError(f"Erro HTTP ao efetuar login: {resp.status_code} - {resp.text}")
-        data = resp.json()
-        session = data.get("session")
-        if not session:
-            raise ControlIDError(f"Resposta inesperada ao efetuar login: {data}")
+        with self._session_lock:
+            try:
+                resp = self._session_http.post(url, json=payload, timeout=self.timeout)
+            except Exception as exc:
+                raise ControlIDError(f"Erro ao conectar ao equipamento: {exc}")
+            if resp.status_code != 200:
+                raise ControlIDError(f"Erro HTTP ao efetuar login: {resp.status_code} - {resp.text}")
+            data = _loads(resp)
+            session = data.get("session")
+            if not session:
+                raise ControlIDError(f"Resposta inesperada ao efetuar login: {data}")
+            self._set_session(session)
+            return session
+
+    def _set_session(self, session: str) -> None:
+        """Registra a sessão corrente e pré-monta as URLs dos endpoints."""
+        self._urls = {
+            name: f"{self.base_url}{path}?session={session}"
+            for name, path in _ENDPOINT_PATHS.items()
+        }
         self._session_id = session
-        return session
+        self._session_expires_at = time.monotonic() + self._session_ttl
 
     def session_is_valid(self) -> bool:
         """Verifica se a sessão corrente é válida.
@@ -107,30 +468,56 @@ class ControlIDClient:
         """
         if not self._session_id:
             return False
-        url = f"{self.base_url}/session_is_valid.fcgi?session={self._session_id}"
+        url = self._urls["session_is_valid"]
         try:
             resp = self._session_http.post(url, timeout=self.timeout)
         except Exception as exc:
             raise ControlIDError(f"Erro ao checar sessão: {exc}")
         if resp.status_code != 200:
             raise ControlIDError(f"Erro HTTP ao checar sessão: {resp.status_code} - {resp.text}")
-        data = resp.json()
+        data = _loads(resp)
         return bool(data.get("session_is_valid"))
 
     def ensure_session(self) -> None:
-        """Garante que existe uma sessão válida, realizando login se necessário."""
-        if not self._session_id or not self.session_is_valid():
-            self.login_session()
+        """Garante que existe uma sessão válida, realizando login se necessário.
+
+        A validade é controlada localmente pelo TTL da sessão; respostas de
+        sessão expirada em :meth:`_post_json` invalidam a sessão antes disso.
+        """
+        if self._session_id and time.monotonic() < self._session_expires_at:
+            return
+        with self._session_lock:
+            # outra thread pode ter renovado a sessão enquanto esperávamos o lock
+            if not self._session_id or time.monotonic() >= self._session_expires_at:
+                self.login_session()
+
+    def invalidate_session(self) -> None:
+        """Descarta a sessão local, forçando novo login na próxima chamada."""
+        with self._session_lock:
+            self._session_expires_at = 0
+            self._session_id = None
+            self._urls = {}
+
+    def _renew_session(self, stale: Optional[str]) -> None:
+        """Refaz o login após sessão expirada, a menos que outra thread já o tenha feito.
+
+        A sessão antiga não é descartada antes do login: ``_set_session`` troca
+        as URLs de uma só vez, e threads que já passaram por
+        :meth:`ensure_session` nunca encontram ``_urls`` vazio.
+        """
+        with self._session_lock:
+            if self._session_id == stale:
+                self.login_session()
 
     def logout(self) -> None:
         """Encerra a sessão atual (opcional)."""
         if not self._session_id:
             return
-        url = f"{self.base_url}/logout.fcgi?session={self._session_id}"
+        url = self._urls["logout"]
         try:
             self._session_http.post(url, timeout=self.timeout)
         finally:
-            self._session_id = None
+            self.invalidate_session()
 
     # ------------------------------------------------------------------
     # Operações genéricas
@@ -139,24 +526,83 @@ class ControlIDClient:
 
         O método já adiciona o parâmetro de sessão na query‑string.
 
-        :param endpoint: Caminho do endpoint (por exemplo, "/create_objects.fcgi").
+        :param endpoint: Nome do endpoint em ``_ENDPOINT_PATHS`` (por exemplo, "create_objects").
         :param payload: Dicionário com o corpo da requisição.
         :returns: Dados retornados pela API (normalmente um dicionário).
         :raises ControlIDError: se a requisição falhar.
         """
+        resp = self._request(
+            "post",
+            endpoint,
+            data=_dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        if resp.status_code != 200:
+            raise ControlIDError(f"Erro HTTP ao chamar {endpoint}: {resp.status_code} - {resp.text}")
+        # algumas respostas retornam texto em vez de JSON válido
+        return _decode_body(resp)
+
+    def _request(self, method: str, endpoint: str, query: str = "", **kwargs: Any) -> requests.Response:
+        """Executa uma requisição autenticada, sem tratar o status HTTP.
+
+        Se o equipamento sinalizar sessão expirada antes do TTL local, a sessão
+        é renovada e a requisição repetida uma vez. Corpos em streaming são
+        rebobinados para a repetição; se não for possível, a sessão é renovada
+        mas a resposta de sessão expirada é devolvida.
+
+        :param method: Método de ``requests.Session`` ("post" ou "get").
+        :param endpoint: Nome do endpoint em ``_ENDPOINT_PATHS``.
+        :param query: Parâmetros adicionais da query-string (ex.: "&user_id=1").
+        :param kwargs: Demais argumentos repassados ao ``requests``.
+        """
         self.ensure_session()
-        url = f"{self.base_url}{endpoint}?session={self._session_id}"
+        session = self._session_id
+        stream = kwargs.get("data") if hasattr(kwargs.get("data"), "read") else None
+        start = None
+        if stream is not None and getattr(stream, "seekable", lambda: False)():
+            start = stream.tell()
+        resp = self._send(method, endpoint, query, **kwargs)
+        if self._session_expired(resp):
+            self._renew_session(session)
+            if stream is not None:
+                if start is None:
+                    return resp
+                stream.seek(start)
+            resp = self._send(method, endpoint, query, **kwargs)
+        return resp
+
+    def _send(self, method: str, endpoint: str, query: str = "", **kwargs: Any) -> requests.Response:
+        """Envia a requisição uma única vez com a sessão corrente."""
+        url = self._urls[endpoint] + query
+        self._throttle()
         try:
-            resp = self._session_http.post(url, json=payload, timeout=self.timeout)
+            resp = getattr(self._session_http, method)(url, timeout=self.timeout, **kwargs)
         except Exception as exc:
             raise ControlIDError(f"Erro ao chamar {endpoint}: {exc}")
-        if resp.status_code != 200:
-            raise ControlIDError(f"Erro HTTP ao chamar {endpoint}: {resp.status_code} - {resp.text}")
-        # algumas respostas retornam texto em vez de JSON válido
+        self._note_throttling(resp)
+        return resp
+
+    def _throttle(self) -> None:
+        """Aguarda um token do limitador de taxa, se habilitado."""
+        if self._bucket is not None:
+            self._bucket.acquire()
+
+    def _note_throttling(self, resp: requests.Response) -> None:
+        """Pausa o limitador de taxa quando o equipamento responde 429."""
+        if self._bucket is None or resp.status_code != 429:
+            return
         try:
-            return resp.json()
-        except json.JSONDecodeError:
-            return resp.text
+            delay = float(resp.headers.get("Retry-After", 1))
+        except ValueError:
+            delay = 1.0
+        self._bucket.pause(delay)
+
+    @staticmethod
+    def _session_expired(resp: requests.Response) -> bool:
+        """Indica se a resposta do equipamento sinaliza sessão inválida ou expirada."""
+        if resp.status_code in (401, 403):
+            return True
+        return resp.status_code != 200 and "session" in resp.text.lower()
 
     # ------------------------------------------------------------------
     # CRUD de objetos
@@ -168,7 +614,10 @@ class ControlIDClient:
         :returns: Lista de IDs gerados.
         """
         payload = {"object": object_type, "values": list(values)}
-        data = self._post_json("/create_objects.fcgi", payload)
+        try:
+            data = self._post_json("create_objects", payload)
+        finally:
+            self._read_cache.invalidate(object_type)
         # a API retorna normalmente {'ids': [1, 2, 3]}
         ids = data.get("ids")
         return ids if ids is not None else []
@@ -182,7 +631,10 @@ class ControlIDClient:
         :returns: Número de registros alterados.
         """
         payload = {"object": object_type, "values": values, "where": {object_type: where}}
-        data = self._post_json("/modify_objects.fcgi", payload)
+        try:
+            data = self._post_json("modify_objects", payload)
+        finally:
+            self._read_cache.invalidate(object_type)
         return int(data.get("modified", 0))
 
     def destroy_objects(self, object_type: str, where: Dict[str, Any]) -> int:
@@ -193,7 +645,12 @@ class ControlIDClient:
         :returns: Número de registros removidos.
         """
         payload = {"object": object_type, "where": {object_type: where}}
-        data = self._post_json("/destroy_objects.fcgi", payload)
+        try:
+            data = self._post_json("destroy_objects", payload)
+        finally:
+            self._read_cache.invalidate(object_type)
+            if object_type == "users":
+                self._read_cache.invalidate("user_images")
         return int(data.get("destroyed", 0))
 
     def load_objects(
@@ -214,6 +671,17 @@ class ControlIDClient:
         :param where: Filtro de consulta.
         :returns: Lista de objetos.
         """
+        key = (
+            object_type,
+            tuple(fields or ()),
+            limit,
+            offset,
+            json.dumps(where or {}, sort_keys=True, default=str),
+        )
+        cached = self._read_cache.get(key)
+        if cached is not _MISSING:
+            return cached
+        generation = self._read_cache.generation(object_type)
         payload: Dict[str, Any] = {"object": object_type}
         if fields:
             payload["fields"] = fields
@@ -223,8 +691,10 @@ class ControlIDClient:
             payload["offset"] = offset
         if where:
             payload["where"] = {object_type: where}
-        data = self._post_json("/load_objects.fcgi", payload)
-        return data.get("objects", [])  # returns list of dicts
+        data = self._post_json("load_objects", payload)
+        objects = data.get("objects", [])  # returns list of dicts
+        self._read_cache.set(key, objects, generation)
+        return objects
 
     # ------------------------------------------------------------------
     # Métodos de alto nível (usuários)
@@ -285,41 +755,43 @@ class ControlIDClient:
         """Envia uma foto facial para um usuário.
 
         :param user_id: ID do usuário.
-        :param image: Caminho para o arquivo de imagem ou bytes da imagem JPEG.
+        :param image: Caminho para o arquivo de imagem, bytes (ou bytearray/memoryview)
+            da imagem JPEG ou objeto de arquivo aberto em modo binário (enviado em streaming).
         :param timestamp: Unix timestamp em milissegundos; se None, usa agora.
         :param match: Verdadeiro para detectar duplicidade de rosto.
         :returns: Objeto JSON retornado pelo equipamento, contendo scores ou erros.
         """
-        self.ensure_session()
         if timestamp is None:
             timestamp = int(time.time() * 1000)
         match_param = 1 if match else 0
-        url = (
-            f"{self.base_url}/user_set_image.fcgi"
-            f"?session={self._session_id}&user_id={user_id}&timestamp={timestamp}&match={match_param}"
-        )
+        query = f"&user_id={user_id}&timestamp={timestamp}&match={match_param}"
         # abrir arquivo se for caminho
         if isinstance(image, str):
             with open(image, "rb") as fh:
                 data = fh.read()
+        elif hasattr(image, "read"):
+            # o requests envia objetos de arquivo em blocos, sem carregar tudo em memória
+            data = image
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            # o requests aceita qualquer buffer; evita a cópia de bytes(image)
+            data = image
         else:
-            data = bytes(image)
+            raise TypeError("image deve ser caminho, bytes, bytearray, memoryview ou objeto de arquivo")
         try:
-            resp = self._session_http.post(
-                url,
+            resp = self._request(
+                "post",
+                "user_set_image",
+                query,
                 data=data,
                 headers={"Content-Type": "application/octet-stream"},
-                timeout=self.timeout,
             )
-        except Exception as exc:
-            raise ControlIDError(f"Erro ao enviar imagem: {exc}")
+        finally:
+            self._read_cache.invalidate("user_images")
         if resp.status_code != 200:
             raise ControlIDError(f"Erro HTTP ao enviar imagem: {resp.status_code} - {resp.text}")
         # a resposta pode ser JSON ou plain text
-        try:
-            return resp.json()
-        except json.JSONDecodeError:
-            return {"response": resp.text}
+        body = _decode_body(resp)
+        return {"response": body} if isinstance(body, str) else body
 
     def set_user_image_list(
         self,
@@ -334,28 +806,14 @@ class ControlIDClient:
         :returns: JSON com resultados por usuário.
         """
         self.ensure_session()
-        images_payload = []
-        for item in user_images:
-            uid = item["user_id"]
-            ts = item.get("timestamp", int(time.time() * 1000))
-            img = item["image"]
-            if isinstance(img, bytes):
-                img_base64 = base64.b64encode(img).decode()
-            elif isinstance(img, str):
-                if os.path.isfile(img):
-                    with open(img, "rb") as fh:
-                        img_base64 = base64.b64encode(fh.read()).decode()
-                else:
-                    # assume string já em base64
-                    img_base64 = img
-            else:
-                raise ValueError("Campo image deve ser bytes, caminho ou string base64")
-            images_payload.append({"user_id": uid, "timestamp": ts, "image": img_base64})
         payload = {
             "match": 1 if match else 0,
-            "user_images": images_payload,
+            "user_images": _encode_user_images(user_images),
         }
-        data = self._post_json("/user_set_image_list.fcgi", payload)
+        try:
+            data = self._post_json("user_set_image_list", payload)
+        finally:
+            self._read_cache.invalidate("user_images")
         return data
 
     def list_user_images(self, *, get_timestamp: bool = False) -> List[Any]:
@@ -364,16 +822,18 @@ class ControlIDClient:
         :param get_timestamp: Se verdadeiro, retorna objetos com user_id e timestamp.
         :returns: Lista de IDs ou de objetos {"id": ..., "timestamp": ...}.
         """
-        self.ensure_session()
+        key = ("user_images", "list", get_timestamp)
+        cached = self._read_cache.get(key)
+        if cached is not _MISSING:
+            return cached
+        generation = self._read_cache.generation("user_images")
         get_ts = 1 if get_timestamp else 0
-        url = (
-            f"{self.base_url}/user_list_images.fcgi"
-            f"?session={self._session_id}&get_timestamp={get_ts}"
-        )
-        resp = self._session_http.get(url, timeout=self.timeout)
+        resp = self._request("get", "user_list_images", f"&get_timestamp={get_ts}")
         if resp.status_code != 200:
             raise ControlIDError(f"Erro ao listar imagens: {resp.status_code} - {resp.text}")
-        return resp.json().get("user_ids", [])
+        user_ids = _loads(resp).get("user_ids", [])
+        self._read_cache.set(key, user_ids, generation)
+        return user_ids
 
     def get_user_image_list(self, user_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """Obtém imagens (base64) de usuários.
@@ -381,12 +841,19 @@ class ControlIDClient:
         :param user_ids: Lista de IDs; se None, solicita imagens de todos os usuários com imagem.
         :returns: Lista de dicts com keys `id`, `timestamp` e `image` (base64).
         """
+        key = ("user_images", "get", tuple(user_ids or ()))
+        cached = self._read_cache.get(key)
+        if cached is not _MISSING:
+            return cached
+        generation = self._read_cache.generation("user_images")
         self.ensure_session()
         payload: Dict[str, Any] = {}
         if user_ids:
             payload["user_ids"] = user_ids
-        data = self._post_json("/user_get_image_list.fcgi", payload)
-        return data.get("user_images", [])
+        data = self._post_json("user_get_image_list", payload)
+        user_images = data.get("user_images", [])
+        self._read_cache.set(key, user_images, generation)
+        return user_images
 
     def delete_user_image(self, user_id: Optional[int] = None, user_ids: Optional[List[int]] = None, all_images: bool = False) -> None:
         """Remove imagens faciais de usuários.
@@ -406,4 +873,7 @@ class ControlIDClient:
         else:
             raise ValueError("Informe user_id, user_ids ou all_images=True")
         # A documentação diz que este endpoint não retorna corpo
-        self._post_json("/user_destroy_image.fcgi", payload)
+        try:
+            self._post_json("user_destroy_image", payload)
+        finally:
+            self._read_cache.invalidate("user_images")
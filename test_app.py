@@ -0,0 +1,233 @@
+"""
+Testes unitários para o backend Flask (``app.py``).
+
+O módulo ``app`` cria o cliente (com login) e o mapeamento de registros ao ser
+importado; os testes o importam com o login simulado e o mapeamento em
+``:memory:``, e cada teste usa um mapeamento novo.
+"""
+
+import importlib
+import io
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+import requests
+
+pytest.importorskip("flask")
+
+from controlid_system.client.controlid_client import ControlIDClient, ControlIDError
+
+
+def _import_app():
+    with patch.dict(os.environ, {"CONTROLID_MAP_DB": ":memory:"}), patch.object(
+        ControlIDClient, "login_session"
+    ):
+        return importlib.import_module("controlid_system.client.app")
+
+
+class TestRegistrationStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.RegistrationStore = _import_app().RegistrationStore
+
+    def setUp(self) -> None:
+        self.store = self.RegistrationStore(":memory:")
+
+    def test_get_unknown_registration(self) -> None:
+        self.assertIsNone(self.store.get("1234"))
+
+    def test_put_and_replace(self) -> None:
+        self.store.put("1234", 1)
+        self.assertEqual(self.store.get("1234"), 1)
+        self.store.put("1234", 2)
+        self.assertEqual(self.store.get("1234"), 2)
+
+    def test_put_many(self) -> None:
+        self.store.put_many({"1234": 1, "5678": 2})
+        self.assertEqual(self.store.get("1234"), 1)
+        self.assertEqual(self.store.get("5678"), 2)
+
+    def test_delete(self) -> None:
+        self.store.put("1234", 1)
+        self.store.delete("1234")
+        self.assertIsNone(self.store.get("1234"))
+        # remover um registro desconhecido não é erro
+        self.store.delete("9999")
+
+    def test_writes_are_visible_to_other_instances(self) -> None:
+        # Cada worker do gunicorn tem a própria instância sobre o mesmo arquivo
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = str(pathlib.Path(tmpdir.name, "user_map.sqlite3"))
+        worker_a = self.RegistrationStore(path)
+        worker_b = self.RegistrationStore(path)
+        worker_a.put("1234", 1)
+        self.assertEqual(worker_b.get("1234"), 1)
+        worker_a.delete("1234")
+        worker_a.put("1234", 2)
+        self.assertEqual(worker_b.get("1234"), 2)
+        worker_a.delete("1234")
+        self.assertIsNone(worker_b.get("1234"))
+
+
+class TestBatchEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app_module = _import_app()
+        cls.http = cls.app_module.app.test_client()
+
+    def setUp(self) -> None:
+        # Mapeamento novo e cliente simulado (com a assinatura real) por teste
+        patcher = patch.object(self.app_module, "user_map", self.app_module.RegistrationStore(":memory:"))
+        self.user_map = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(self.app_module, "client", autospec=True)
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_batch(self) -> None:
+        self.client.create_objects.return_value = [10, 11]
+        resp = self.http.post("/api/users/batch", json={"users": [
+            {"registration": "1", "name": "A"},
+            {"registration": "2", "name": "B"},
+        ]})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.get_json(), {"users": {"1": 10, "2": 11}})
+        self.client.create_objects.assert_called_once()
+        self.assertEqual(self.user_map.get("2"), 11)
+
+    def test_create_rejects_non_string_registration(self) -> None:
+        resp = self.http.post("/api/users", json={"registration": ["a"], "name": "x"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.http.post("/api/users/batch", json={"users": [{"registration": {"a": 1}, "name": "x"}]})
+        self.assertEqual(resp.status_code, 400)
+        self.client.create_user.assert_not_called()
+        self.client.create_objects.assert_not_called()
+
+    def test_create_batch_rejects_duplicates_and_reserved(self) -> None:
+        for registrations in (["1", "1"], ["batch"]):
+            with self.subTest(registrations=registrations):
+                users = [{"registration": r, "name": "A"} for r in registrations]
+                resp = self.http.post("/api/users/batch", json={"users": users})
+                self.assertEqual(resp.status_code, 400)
+        self.client.create_objects.assert_not_called()
+        resp = self.http.post("/api/users", json={"registration": "batch", "name": "A"})
+        self.assertEqual(resp.status_code, 400)
+        self.client.create_user.assert_not_called()
+
+    def test_update_batch_reports_each_failure(self) -> None:
+        self.user_map.put("1", 10)
+        resp = self.http.put("/api/users/batch", json={"users": [
+            {"registration": "1", "name": "Novo"},
+            {"name": "sem registro"},
+            "inválido",
+            {"registration": "2", "name": "não mapeado"},
+        ]})
+        # parte do lote foi aplicada
+        self.assertEqual(resp.status_code, 207)
+        body = resp.get_json()
+        self.assertEqual(body["updated"], ["1"])
+        self.assertEqual([e["index"] for e in body["errors"]], [1, 2, 3])
+        self.client.update_user.assert_called_once_with(10, name="Novo")
+
+    def test_delete_batch(self) -> None:
+        self.user_map.put_many({"1": 10, "2": 20})
+        self.client.delete_user.side_effect = [None, ControlIDError("falhou")]
+        resp = self.http.delete("/api/users/batch", json={"users": ["1", "2", None, None]})
+        self.assertEqual(resp.status_code, 207)
+        body = resp.get_json()
+        self.assertEqual(body["removed"], ["1"])
+        self.assertEqual(
+            [(e["index"], e["registration"]) for e in body["errors"]],
+            [(1, "2"), (2, None), (3, None)],
+        )
+        self.assertIsNone(self.user_map.get("1"))
+        self.assertEqual(self.user_map.get("2"), 20)
+        # nada aplicado: 400
+        resp = self.http.delete("/api/users/batch", json={"users": ["9"]})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_image_upload_stays_in_memory(self) -> None:
+        # Preparar a requisição não deve despejar o spool do upload em disco
+        self.user_map.put("1", 10)
+        prepared = []
+        def set_user_image(device_id, image):
+            req = requests.Request("POST", "http://device.test/user_set_image.fcgi", data=image).prepare()
+            prepared.append((req.headers["Content-Length"], image._stream._rolled, image.read()))
+            return {}
+        self.client.set_user_image.side_effect = set_user_image
+        resp = self.http.post(
+            "/api/users/1/image",
+            data={"file": (io.BytesIO(b"\xff" * 2048), "1.jpg")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(prepared, [("2048", False, b"\xff" * 2048)])
+
+    def test_images_batch(self) -> None:
+        self.user_map.put_many({"1": 10, "2": 20})
+        self.client.set_user_image_list.return_value = {"results": []}
+        resp = self.http.post(
+            "/api/users/images/batch",
+            data={
+                "file_1": (io.BytesIO(b"\xff\xd8\xff"), "1.jpg"),
+                "file_2": (io.BytesIO(b"\xff\xd8\xfe"), "2.jpg"),
+            },
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["registrations"], ["1", "2"])
+        images = self.client.set_user_image_list.call_args.args[0]
+        self.assertEqual(
+            images,
+            [{"user_id": 10, "image": b"\xff\xd8\xff"}, {"user_id": 20, "image": b"\xff\xd8\xfe"}],
+        )
+
+
+class TestListUsers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app_module = _import_app()
+        cls.http = cls.app_module.app.test_client()
+
+    def setUp(self) -> None:
+        patcher = patch.object(self.app_module, "client", autospec=True)
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.load_objects.return_value = [{"id": 1, "registration": "1", "name": "A"}]
+
+    def test_list_users(self) -> None:
+        resp = self.http.get("/api/users?registration=1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.get_json(),
+            {"limit": 100, "offset": 0, "users": [{"id": 1, "registration": "1", "name": "A"}]},
+        )
+        self.client.load_objects.assert_called_once_with(
+            "users", fields=["id", "registration", "name"], limit=100, offset=0,
+            where={"registration": "1"},
+        )
+
+    def test_limit_is_clamped_and_validated(self) -> None:
+        resp = self.http.get("/api/users?limit=1000000&offset=5")
+        self.assertEqual(resp.get_json()["limit"], self.app_module.MAX_USERS_PAGE)
+        self.assertEqual(self.client.load_objects.call_args.kwargs["limit"], self.app_module.MAX_USERS_PAGE)
+        for query in ("limit=0", "offset=-1"):
+            with self.subTest(query=query):
+                self.assertEqual(self.http.get(f"/api/users?{query}").status_code, 400)
+
+    def test_etag_revalidation(self) -> None:
+        resp = self.http.get("/api/users")
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+        etag = resp.headers["ETag"]
+        resp = self.http.get("/api/users", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        # após uma escrita a página muda, e com ela o ETag
+        self.client.load_objects.return_value = []
+        resp = self.http.get("/api/users", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers["ETag"], etag)
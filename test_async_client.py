@@ -0,0 +1,88 @@
+"""
+Testes unitários para o AsyncControlIDClient.
+
+As respostas do equipamento são simuladas com ``httpx.MockTransport``: cada
+teste registra as requisições recebidas e responde conforme o caminho da URL.
+"""
+
+import json
+import unittest
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from controlid_system.client.controlid_async_client import AsyncControlIDClient
+
+
+class TestAsyncControlIDClient(unittest.IsolatedAsyncioTestCase):
+    base_url = "http://device.test"
+
+    def _client(self, handler) -> AsyncControlIDClient:
+        client = AsyncControlIDClient(
+            self.base_url, "admin", "admin", transport=httpx.MockTransport(handler)
+        )
+        self.addAsyncCleanup(client._http.aclose)
+        return client
+
+    async def test_login_session(self) -> None:
+        sent = []
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request)
+            return httpx.Response(200, json={"session": "abc123"})
+        client = self._client(handler)
+        self.assertEqual(await client.login_session(), "abc123")
+        self.assertEqual(str(sent[0].url), f"{self.base_url}/login.fcgi")
+        self.assertEqual(json.loads(sent[0].content), {"login": "admin", "password": "admin"})
+        self.assertTrue(client._urls["create_objects"].endswith("?session=abc123"))
+
+    async def test_expired_session_is_renewed(self) -> None:
+        # 401 com a sessão antiga: refaz login e repete a chamada uma única vez
+        paths = []
+        def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(f"{request.url.path}?{request.url.query.decode()}".rstrip("?"))
+            if request.url.path == "/login.fcgi":
+                return httpx.Response(200, json={"session": f"sess{len(paths)}"})
+            if request.url.params["session"] == "sess1":
+                return httpx.Response(401, text="Invalid session")
+            return httpx.Response(200, json={"user_ids": [1]})
+        client = self._client(handler)
+        await client.login_session()
+        self.assertEqual(await client.list_user_images(), [1])
+        self.assertEqual(client._session_id, "sess3")
+        self.assertEqual(paths, [
+            "/login.fcgi",
+            "/user_list_images.fcgi?session=sess1&get_timestamp=0",
+            "/login.fcgi",
+            "/user_list_images.fcgi?session=sess3&get_timestamp=0",
+        ])
+
+    async def test_set_user_image_text_body(self) -> None:
+        # respostas em texto puro são devolvidas em {"response": ...}
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/login.fcgi":
+                return httpx.Response(200, json={"session": "sess1"})
+            self.assertEqual(request.url.params["user_id"], "7")
+            self.assertEqual(request.content, b"\xff\xd8\xff")
+            return httpx.Response(200, text="OK", headers={"Content-Type": "text/plain"})
+        client = self._client(handler)
+        self.assertEqual(await client.set_user_image(7, b"\xff\xd8\xff"), {"response": "OK"})
+
+    async def test_set_user_image_list_preserves_order(self) -> None:
+        bodies = []
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/login.fcgi":
+                return httpx.Response(200, json={"session": "sess1"})
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"results": []})
+        client = self._client(handler)
+        await client.set_user_image_list([
+            {"user_id": 3, "image": b"\xff\xd8\xff", "timestamp": 30},
+            {"user_id": 1, "image": b"\xff\xd8\xfe", "timestamp": 10},
+            {"user_id": 2, "image": "AAAA", "timestamp": 20},
+        ])
+        self.assertEqual(bodies[0]["user_images"], [
+            {"user_id": 3, "timestamp": 30, "image": "/9j/"},
+            {"user_id": 1, "timestamp": 10, "image": "/9j+"},
+            {"user_id": 2, "timestamp": 20, "image": "AAAA"},
+        ])
@@ -6,181 +6,441 @@ Como não temos acesso a um equipamento real durante os testes, utilizamos
 funcionamento dos métodos de alto nível e o gerenciamento de sessões.
 """
 
-import os
+import functools
 import io
 import json
+import os
+import pathlib
+import socket
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+from unittest.mock import ANY, DEFAULT, MagicMock, call, patch
+
+import pytest
+import requests
+from urllib3.util.retry import RequestHistory
+
+# O ajuste de sys.path para importar o pacote local fica em conftest.py
+from controlid_system.client.controlid_client import (
+    ControlIDClient,
+    ControlIDError,
+    TokenBucket,
+    _encode_user_images,
+)
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True, slots=True)
+class _FakeResp:
+    """Resposta HTTP simulada: apenas os atributos que o cliente lê."""
+
+    status_code: int = 200
+    content: bytes = b"null"
+    text: str = ""
+    headers: Dict[str, str] = field(default_factory=lambda: dict(_JSON_HEADERS))
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def _resp(payload, status=200, text=""):
+    """Monta uma resposta simulada leve com corpo JSON (``json()`` e ``content``).
+
+    Respostas iguais são reaproveitadas (ver :func:`_resp_cached`).
+    """
+    return _resp_cached(json.dumps(payload, sort_keys=True), status, text)
+
+
+@functools.lru_cache(maxsize=32)
+def _resp_cached(body, status, text):
+    # Seguro porque os testes apenas leem a resposta; ``json()`` decodifica o
+    # corpo a cada chamada, então o payload devolvido nunca é compartilhado.
+    return _FakeResp(status_code=status, content=body.encode(), text=text)
+
+
+# Endereço fictício do equipamento usado em todos os testes
+_BASE_URL = "http://device.test"
+# Posição em que o caminho começa nas URLs montadas pelo cliente ("{base}/...")
+_PATH_START = len(_BASE_URL) + 1
+
+# Respostas simuladas, montadas uma única vez e apenas lidas pelos testes
+_RESP_SET_IMAGE = _resp({"scores": {"sharpness": 500}})
+_RESP_LIST_IMAGES = _resp({"user_ids": [1]})
 
-# Ajusta sys.path para permitir importação do pacote local quando os testes são
-# executados a partir do diretório controlid_system. Sem esse ajuste,
-# 'controlid_system' pode não ser encontrado pelo import.
-import sys
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
+# Respostas por caminho da URL (endpoint + sessão, sem os demais parâmetros).
+# Não há entradas para login.fcgi nem session_is_valid.fcgi: os clientes dos
+# testes de operações já começam com sessão ativa, e qualquer ida ao login
+# nesses testes falha no dispatcher.
+_URL_RESPONSES = {
+    "create_objects.fcgi?session=sess1": _resp({"ids": [99]}),
+    "modify_objects.fcgi?session=sess1": _resp({"modified": 1}),
+    "destroy_objects.fcgi?session=sess1": _resp({"destroyed": 1}),
+    "load_objects.fcgi?session=sess1": _resp({"objects": [{"id": 1}]}),
+    "user_set_image.fcgi?session=sess1": _RESP_SET_IMAGE,
+    "user_set_image_list.fcgi?session=sess1": _resp({"result": [{"id": 1, "success": True}]}),
+}
 
-from controlid_system.client.controlid_client import ControlIDClient, ControlIDError
 
+def _post_dispatch(session, url, **kwargs):
+    """side_effect de ``Session.post``: resolve a resposta pelo caminho da URL."""
+    path = url[_PATH_START:]
+    resp = _URL_RESPONSES.get(path)
+    if resp is None and "&" in path:
+        # user_set_image.fcgi leva user_id/timestamp/match após a sessão
+        resp = _URL_RESPONSES.get(path.split("&", 1)[0])
+    if resp is None:
+        raise AssertionError(f"Unexpected POST called: {url}")
+    return resp
 
+
+@pytest.fixture(scope="class")
+def mock_post(request):
+    """Substitui ``Session.post`` uma única vez para toda a classe de testes.
+
+    Cada teste só configura ``return_value``/``side_effect`` (zerados em
+    ``setUp``). Com autospec, o mock segue a assinatura de ``Session.post`` e
+    recebe a sessão como primeiro argumento. Guardamos o mock interno
+    (``.mock``): a função gerada pelo autospec viraria método ligado ao ser lida
+    pela instância do teste.
+    """
+    patcher = patch.object(requests.Session, "post", autospec=True)
+    request.cls.mock_post = patcher.start().mock
+    request.addfinalizer(patcher.stop)
+    return request.cls.mock_post
+
+
+@pytest.mark.usefixtures("mock_post")
 class TestControlIDClient(unittest.TestCase):
-    def setUp(self) -> None:
+    @classmethod
+    def setUpClass(cls) -> None:
         # Configuração básica para o cliente; base_url é fictício
-        self.base_url = "http://device.test"
-        self.login = "admin"
-        self.password = "admin"
+        cls.base_url = _BASE_URL
+        cls.login = "admin"
+        cls.password = "admin"
+        # URLs completas usadas nas comparações, formatadas uma única vez
+        cls._URL_LOGIN = f"{cls.base_url}/login.fcgi"
+        cls._URL_DESTROY_SESS1 = f"{cls.base_url}/destroy_objects.fcgi?session=sess1"
+        cls._URL_DESTROY_SESS3 = f"{cls.base_url}/destroy_objects.fcgi?session=sess3"
+        # Cliente compartilhado, já com sessão ativa: os testes de operações não
+        # passam por login (os testes de login criam o próprio cliente). O cache de
+        # leitura fica desligado para que um teste não veja respostas de outro.
+        cls.client = ControlIDClient(
+            cls.base_url, cls.login, cls.password, auto_login=False, read_cache_ttl=0
+        )
+        cls.client._set_session("sess1")
+        # Chamada esperada ao login.fcgi, montada uma vez para a classe
+        cls._EXPECTED_LOGIN_CALL = call(
+            ANY,
+            cls._URL_LOGIN,
+            json={"login": cls.login, "password": cls.password},
+            timeout=cls.client.timeout,
+        )
+
+    def setUp(self) -> None:
+        # Com autospec, reset_mock(return_value=True, side_effect=True) não limpa
+        # esses atributos; eles são restaurados explicitamente
+        self.mock_post.reset_mock()
+        self.mock_post.side_effect = None
+        self.mock_post.return_value = DEFAULT
 
-    @patch("requests.Session.post")
-    def test_login_session_success(self, mock_post: MagicMock) -> None:
+    def test_login_session_success(self) -> None:
         # Simula retorno da API de login
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"session": "abc123"}
+        self.mock_post.return_value = _resp({"session": "abc123"})
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
         session = client.login_session()
         self.assertEqual(session, "abc123")
         self.assertEqual(client._session_id, "abc123")
         # Verifica se a chamada foi feita com JSON correto
-        mock_post.assert_called_with(
-            f"{self.base_url}/login.fcgi",
-            json={"login": self.login, "password": self.password},
-            timeout=client.timeout,
-        )
+        self.assertEqual(self.mock_post.call_args, self._EXPECTED_LOGIN_CALL)
 
-    @patch("requests.Session.post")
-    def test_login_session_error(self, mock_post: MagicMock) -> None:
+    def test_login_session_error(self) -> None:
         # Simula erro HTTP
-        mock_post.return_value.status_code = 401
-        mock_post.return_value.text = "Unauthorized"
+        self.mock_post.return_value = _resp({}, status=401, text="Unauthorized")
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
         with self.assertRaises(ControlIDError):
             client.login_session()
 
-    @patch("requests.Session.post")
-    def test_create_user(self, mock_post: MagicMock) -> None:
-        # Simula login e criação de usuário
-        def side_effect(url, json=None, timeout=None, **kwargs):
-            # Respostas para login
-            if url.endswith("/login.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session": "sess1"}
-                return resp
-            # Verificação de sessão válida
-            if url.endswith("/session_is_valid.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session_is_valid": True}
-                return resp
-            # Criação de usuário
-            if url.endswith("/create_objects.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"ids": [99]}
-                return resp
-            raise AssertionError(f"Unexpected URL called: {url}")
-        mock_post.side_effect = side_effect
-        # auto_login=False pois vamos lidar com login na primeira chamada
+    def test_http_adapter_retries_transient_errors(self) -> None:
+        client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False, max_retries=2)
+        retry = client._session_http.get_adapter(self.base_url).max_retries
+        self.assertEqual(retry.total, 2)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertIn("POST", retry.allowed_methods)
+        # escritas não são repetidas se o equipamento pode já tê-las aplicado
+        self.assertNotIn(500, retry.status_forcelist)
+        self.assertEqual(retry.read, 0)
+
+    def test_low_max_rps_does_not_block(self) -> None:
+        # Com max_rps < 0,5 a rajada ainda comporta uma chamada inteira
+        client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False, max_rps=0.4)
+        self.assertEqual(client._bucket.capacity, 1.0)
+        start = time.monotonic()
+        client._bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.1)
+        with self.assertRaises(ValueError):
+            ControlIDClient(self.base_url, self.login, self.password, auto_login=False, max_rps=-1)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0.4, capacity=0.8)
+
+    def test_adapter_strips_expect_and_sends_pinned_headers(self) -> None:
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
-        # Força login antes de criar usuário para simplificar side_effect
-        client.login_session()
-        user_id = client.create_user("1234", "Test User")
-        self.assertEqual(user_id, 99)
-
-    @patch("requests.Session.post")
-    def test_update_user(self, mock_post: MagicMock) -> None:
-        # Simula login e modificação
-        def side_effect(url, json=None, timeout=None, **kwargs):
-            if url.endswith("/login.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session": "sess1"}
-                return resp
-            if url.endswith("/session_is_valid.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session_is_valid": True}
-                return resp
-            if url.endswith("/modify_objects.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"modified": 1}
-                return resp
-            raise AssertionError(f"Unexpected URL called: {url}")
-        mock_post.side_effect = side_effect
+        session = client._session_http
+        url = f"{self.base_url}/user_set_image.fcgi"
+        prepared = session.prepare_request(
+            requests.Request("POST", url, data=b"\xff", headers={"Expect": "100-continue"})
+        )
+        adapter = session.get_adapter(url)
+        adapter.add_headers(prepared)
+        self.assertNotIn("Expect", prepared.headers)
+        self.assertEqual(prepared.headers["Connection"], "keep-alive")
+        self.assertEqual(prepared.headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(prepared.headers["User-Agent"], "controlid-client/1.0")
+        # o pool aplica keepalive TCP às conexões com o equipamento
+        socket_options = adapter.poolmanager.connection_pool_kw["socket_options"]
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), socket_options)
+
+    def test_retry_backoff_has_jitter(self) -> None:
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
-        client.login_session()
-        # chamada não deve lançar exceção
-        client.update_user(99, name="Novo Nome")
-
-    @patch("requests.Session.post")
-    def test_delete_user(self, mock_post: MagicMock) -> None:
-        # Simula login e remoção
-        def side_effect(url, json=None, timeout=None, **kwargs):
-            if url.endswith("/login.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session": "sess1"}
-                return resp
-            if url.endswith("/session_is_valid.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session_is_valid": True}
-                return resp
-            if url.endswith("/destroy_objects.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"destroyed": 1}
-                return resp
-            raise AssertionError(f"Unexpected URL called: {url}")
-        mock_post.side_effect = side_effect
+        retry = client._session_http.get_adapter(self.base_url).max_retries
+        attempt = RequestHistory("POST", "/create_objects.fcgi", None, 503, None)
+        # a primeira repetição é imediata; as seguintes somam até 100% de jitter
+        self.assertEqual(retry.new(history=(attempt,)).get_backoff_time(), 0)
+        delays = {retry.new(history=(attempt, attempt)).get_backoff_time() for _ in range(20)}
+        self.assertTrue(all(0.6 <= delay <= 1.2 for delay in delays))
+        self.assertGreater(len(delays), 1)
+
+    def test_token_bucket_pause_drains_tokens(self) -> None:
+        bucket = TokenBucket(rate=1000, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+        bucket.pause(0.05)
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_user_crud(self) -> None:
+        # create/update/delete compartilham o cliente e o dispatcher; cada
+        # operação faz uma única chamada (sem login nem session_is_valid)
+        self.mock_post.side_effect = _post_dispatch
+        cases = [
+            ("create", lambda: self.client.create_user("1234", "Test User"), "create_objects.fcgi", 99),
+            ("update", lambda: self.client.update_user(99, name="Novo Nome"), "modify_objects.fcgi", None),
+            ("delete", lambda: self.client.delete_user(99), "destroy_objects.fcgi", None),
+        ]
+        for op, action, endpoint, expected in cases:
+            with self.subTest(op=op):
+                self.mock_post.reset_mock()
+                self.assertEqual(action(), expected)
+                self.mock_post.assert_called_once()
+                self.assertEqual(
+                    self.mock_post.call_args.args[1],
+                    f"{self.base_url}/{endpoint}?session=sess1",
+                )
+
+    def test_load_objects_cache_invalidated_by_writes(self) -> None:
+        # Leituras repetidas vêm do cache até que uma escrita no mesmo tipo o invalide
+        self.mock_post.side_effect = _post_dispatch
+        client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False, read_cache_ttl=60)
+        client._set_session("sess1")
+        users = client.list_users()
+        self.assertEqual(users, [{"id": 1}])
+        # alterar o resultado recebido não altera o que está em cache
+        users[0]["id"] = 2
+        self.assertEqual(client.list_users(), [{"id": 1}])
+        self.assertEqual(self.mock_post.call_count, 1)
+        client.create_user("5678", "Outro")
+        client.list_users()
+        self.assertEqual(self.mock_post.call_count, 3)
+
+    def test_read_in_flight_during_write_is_not_cached(self) -> None:
+        # Uma escrita concluída enquanto a leitura aguardava o equipamento impede
+        # que o resultado anterior a ela volte ao cache
+        client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False, read_cache_ttl=60)
+        client._set_session("sess1")
+        def side_effect(session, url, **kwargs):
+            client._read_cache.invalidate("users")
+            return _post_dispatch(session, url, **kwargs)
+        self.mock_post.side_effect = side_effect
+        client.list_users()
+        self.mock_post.side_effect = _post_dispatch
+        client.list_users()
+        self.assertEqual(self.mock_post.call_count, 2)
+
+    def test_expired_session_is_renewed(self) -> None:
+        # Primeira chamada recebe 401 (sessão expirada); o cliente refaz login e repete
+        calls = []
+        responses = {
+            self._URL_DESTROY_SESS1: _resp({}, status=401, text="Invalid session"),
+            self._URL_DESTROY_SESS3: _resp({"destroyed": 1}),
+        }
+        def side_effect(session, url, json=None, timeout=None, **kwargs):
+            calls.append(url)
+            if url == self._URL_LOGIN:
+                return _resp({"session": f"sess{len(calls)}"})
+            resp = responses.get(url)
+            if resp is None:
+                raise AssertionError(f"Unexpected URL called: {url}")
+            return resp
+        self.mock_post.side_effect = side_effect
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
         client.login_session()
         client.delete_user(99)
+        self.assertEqual(client._session_id, "sess3")
+        # nenhuma consulta a session_is_valid.fcgi no caminho principal
+        self.assertFalse(any("session_is_valid" in url for url in calls))
 
-    @patch("requests.Session.post")
-    @patch("requests.Session.get")
-    def test_set_user_image_and_list_images(self, mock_get: MagicMock, mock_post: MagicMock) -> None:
-        # Simula login e upload de imagem, seguida de listagem
-        def post_side_effect(url, data=None, headers=None, json=None, timeout=None, **kwargs):
-            if url.endswith("/login.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session": "sess1"}
-                return resp
-            if url.endswith("/session_is_valid.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"session_is_valid": True}
-                return resp
-            if url.startswith(f"{self.base_url}/user_set_image.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"scores": {"sharpness": 500}}
-                return resp
-            if url.startswith(f"{self.base_url}/user_set_image_list.fcgi"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"result": [{"id": 1, "success": True}]}
-                return resp
-            if url.endswith("/create_objects.fcgi?session=sess1"):
-                resp = MagicMock()
-                resp.status_code = 200
-                resp.json.return_value = {"ids": [1]}
-                return resp
-            raise AssertionError(f"Unexpected POST called: {url}")
-        mock_post.side_effect = post_side_effect
-        # Simula listagem de imagens
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = {"user_ids": [1]}
+    def test_set_user_image_renews_expired_session(self) -> None:
+        # 401 no upload também renova a sessão e reenvia a foto desde o início
+        sent = []
+        def side_effect(session, url, data=None, json=None, timeout=None, **kwargs):
+            if url == self._URL_LOGIN:
+                sent.append(None)
+                return _resp({"session": f"sess{len(sent)}"})
+            sent.append(data.read())
+            if "user_set_image.fcgi?session=sess1&" in url:
+                return _resp({}, status=401, text="Invalid session")
+            if "user_set_image.fcgi?session=sess3&" in url:
+                return _RESP_SET_IMAGE
+            raise AssertionError(f"Unexpected URL called: {url}")
+        self.mock_post.side_effect = side_effect
         client = ControlIDClient(self.base_url, self.login, self.password, auto_login=False)
         client.login_session()
+        result = client.set_user_image(1, io.BytesIO(b"\xff\xd8\xff"))
+        self.assertIn("scores", result)
+        self.assertEqual(client._session_id, "sess3")
+        self.assertEqual(sent, [None, b"\xff\xd8\xff", None, b"\xff\xd8\xff"])
+
+    def test_empty_json_body_is_returned_as_text(self) -> None:
+        # user_destroy_image.fcgi declara JSON mas responde sem corpo
+        self.mock_post.return_value = _FakeResp(content=b"")
+        self.client.delete_user_image(user_id=1)
+        self.assertEqual(self.client._post_json("user_destroy_image", {"user_id": 1}), "")
+
+    def test_set_user_image_stream(self) -> None:
+        # Objetos de arquivo devem ser repassados ao requests sem leitura prévia
+        self.mock_post.return_value = _RESP_SET_IMAGE
+        stream = io.BytesIO(b"\xff\xd8\xff")
+        self.client.set_user_image(1, stream)
+        self.assertIs(self.mock_post.call_args.kwargs["data"], stream)
+        self.assertEqual(stream.tell(), 0)
+
+    def test_set_user_image_list_encodes_images(self) -> None:
+        # Bytes e caminhos de arquivo devem ser enviados em base64
+        self.mock_post.return_value = _resp({"results": []})
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        img_path = pathlib.Path(tmpdir.name, "img.jpg")
+        img_path.write_bytes(b"\xff\xd8\xfe")
+        self.client.set_user_image_list([
+            {"user_id": 1, "image": b"\xff\xd8\xff", "timestamp": 10},
+            {"user_id": 2, "image": str(img_path), "timestamp": 20},
+        ])
+        body = json.loads(self.mock_post.call_args.kwargs["data"])
+        self.assertEqual(
+            body["user_images"],
+            [
+                {"user_id": 1, "timestamp": 10, "image": "/9j/"},
+                {"user_id": 2, "timestamp": 20, "image": "/9j+"},
+            ],
+        )
+
+    def test_set_user_image(self) -> None:
+        # Simula upload de imagem a partir de bytes
+        self.mock_post.side_effect = _post_dispatch
         fake_img_bytes = b"\xff\xd8\xff"
-        result = client.set_user_image(1, fake_img_bytes)
+        result = self.client.set_user_image(1, fake_img_bytes)
         self.assertIn("scores", result)
-        ids = client.list_user_images()
+
+    @patch("requests.Session.get", autospec=True)
+    def test_list_user_images(self, mock_get: MagicMock) -> None:
+        mock_get.return_value = _RESP_LIST_IMAGES
+        ids = self.client.list_user_images()
         self.assertEqual(ids, [1])
 
 
-if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+class TestRetryPolicy(unittest.TestCase):
+    """Repetições reais do urllib3 contra um servidor HTTP local."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.statuses = []
+        cls.hits = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                cls.hits.append(self.path)
+                status = cls.statuses.pop(0) if cls.statuses else 200
+                body = json.dumps({"ids": [1]}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, args=(0.05,), daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.statuses.clear()
+        self.hits.clear()
+        self.client = ControlIDClient(
+            self.base_url, "admin", "admin", auto_login=False, max_rps=None, read_cache_ttl=0
+        )
+        self.client._set_session("sess1")
+
+    def test_503_is_retried(self) -> None:
+        self.statuses.append(503)
+        self.assertEqual(self.client.create_objects("users", [{"registration": "1"}]), [1])
+        self.assertEqual(len(self.hits), 2)
+
+    def test_500_on_write_is_not_retried(self) -> None:
+        self.statuses.append(500)
+        with self.assertRaises(ControlIDError):
+            self.client.create_objects("users", [{"registration": "1"}])
+        self.assertEqual(len(self.hits), 1)
+
+
+class TestImageEncoding(unittest.TestCase):
+    """Distinção entre caminhos de arquivo e strings base64 em ``image``."""
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = pathlib.Path(tmpdir.name)
+
+    def _encoded(self, image: str) -> str:
+        return _encode_user_images([{"user_id": 1, "image": image, "timestamp": 1}])[0]["image"]
+
+    def test_path_with_extension_is_read(self) -> None:
+        path = self.dir / "foto.jpg"
+        path.write_bytes(b"\xff\xd8\xfe")
+        self.assertEqual(self._encoded(str(path)), "/9j+")
+
+    def test_bare_relative_name_is_read(self) -> None:
+        (self.dir / "foto").write_bytes(b"\xff\xd8\xfe")
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.dir)
+        self.assertEqual(self._encoded("foto"), "/9j+")
+
+    def test_short_base64_with_slash_is_kept(self) -> None:
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.dir)
+        self.assertEqual(self._encoded("/9j/4AAQ"), "/9j/4AAQ")
+        self.assertEqual(self._encoded("9j/4AAQ"), "9j/4AAQ")